@@ -2,163 +2,419 @@
 """
 Script to read and display JSONL result files
 
+Requires numpy, scipy and orjson (pip install -r notebooks/requirements.txt)
+
 Usage:
-    python scripts/analyzer.py [filepath]
+    python scripts/analyzer.py [you_path] [builtin_path] [--no-cache]
 """
 
+import argparse
 import json
+import os
 import sys
+import tempfile
+import zipfile
 from pathlib import Path
+from array import array
 from collections import Counter
 import numpy as np
+import orjson
 from scipy import stats
 
+READ_BUFFER_SIZE = 4 * 1024 * 1024  # 4 MiB: fewer read syscalls on large JSONL files
+RANK_TEST_EXACT_MAX_N = 50  # SciPy's auto-method cutoff: up to this n, defer to its exact/permutation methods
+SUMMARY_CACHE_VERSION = 7  # bump whenever stream_fields changes what it extracts
+PASS_AT_K_ROW = "{:<20} {:<15.4f} {:<15.4f}\n"
+SUMMARY_COUNT_FIELDS = ("count", "parse_errors", "missing_ids", "duplicate_ids")
+SUMMARY_ARRAY_FIELDS = (
+    "ids", "pass_at_k", "has_score", "score_pass", "score_value",
+    "has_timing", "timing_total", "trial_counts",
+)
+
 
 def get_keys_recursive(obj, prefix=""):
-    """Recursively get all keys from a nested dictionary"""
+    """Get all keys from a nested dictionary, walking nested dicts with an explicit stack"""
     keys = []
-    if isinstance(obj, dict):
-        for key, value in obj.items():
-            full_key = f"{prefix}.{key}" if prefix else key
+    stack = [(obj, prefix)]
+    while stack:
+        current, current_prefix = stack.pop()
+        if not isinstance(current, dict):
+            continue
+        for key, value in current.items():
+            full_key = f"{current_prefix}.{key}" if current_prefix else key
             keys.append(full_key)
             if isinstance(value, dict):
-                keys.extend(get_keys_recursive(value, full_key))
+                stack.append((value, full_key))
             elif isinstance(value, list) and value and isinstance(value[0], dict):
-                keys.extend(get_keys_recursive(value[0], f"{full_key}[]"))
+                stack.append((value[0], f"{full_key}[]"))
     return keys
 
 
-def read_records(file_path):
-    """Read and parse JSONL file, return list of records"""
-    records = []
-    with open(file_path, "r", encoding="utf-8") as f:
+def iter_records(file_path, error_lines=None):
+    """
+    Read and parse JSONL file, yielding one record at a time
+    
+    Lines that fail to parse are reported on stderr and skipped; their line
+    numbers are appended to error_lines when a list is given.
+    """
+    with open(file_path, "rb", buffering=READ_BUFFER_SIZE) as f:
         for line_num, line in enumerate(f, 1):
-            line = line.strip()
-            if not line:
+            if not line.strip():
                 continue
             
             try:
-                record = json.loads(line)
-                records.append(record)
-            except json.JSONDecodeError as e:
+                yield orjson.loads(line)
+            except orjson.JSONDecodeError as e:
                 print(f"Error parsing line {line_num} in {file_path}: {e}", file=sys.stderr)
-    return records
+                if error_lines is not None:
+                    error_lines.append(line_num)
+
+
+def extract_summary_fields(r):
+    """Pull the fields stream_fields keeps out of one record, None where missing"""
+    return (
+        r.get("id"),
+        r.get("passAtK"),
+        r.get("score"),
+        (r.get("timing") or {}).get("total"),
+        (r.get("metadata") or {}).get("agent"),
+        r.get("trials"),
+    )
 
 
-def print_stats(records, label=""):
-    """Print statistics for a set of records"""
+def stream_fields(file_path):
+    """
+    Stream a JSONL file, keeping only the fields needed for aggregate statistics
+    
+    Full records are discarded as soon as their fields are extracted, so memory
+    grows with the number of records rather than the size of the JSON.
+    Per-file columns cover every parsed record. The ids/pass_at_k columns used to
+    match the two files hold one entry per id, with the last record winning.
+    Returns a summary dict of columns plus the first full record
+    """
+    first_record = None
+    has_score = array("b")
+    score_pass = array("b")
+    score_value = array("f")
+    has_timing = array("b")
+    timing_total = array("f")
+    agents = []
+    trial_counts = array("q")
+    ids = []
+    # passAtK stays float64: values like 0.9999999999 round to 1.0 in float32,
+    # which would turn head-to-head wins into ties
+    pass_at_k = array("d")
+    index_by_id = {}
+    error_lines = []
+    missing_ids = 0
+    duplicate_ids = 0
+    for record in iter_records(file_path, error_lines):
+        if first_record is None:
+            first_record = record
+        record_id, pak, score, total_time, agent, trials = extract_summary_fields(record)
+        # Explicit None checks: a score object or timing total of 0 is still a measurement
+        has_score.append(score is not None)
+        score_pass.append(score is not None and bool(score.get("pass", False)))
+        score_value.append(0.0 if score is None else score.get("score", 0))
+        has_timing.append(total_time is not None)
+        timing_total.append(0.0 if total_time is None else total_time)
+        agents.append(agent)
+        trial_counts.append(-1 if trials is None else len(trials))
+        
+        if record_id is None:
+            missing_ids += 1
+            continue
+        # Key ids by their JSON encoding so that 1 and "1" stay distinct
+        id_key = orjson.dumps(record_id).decode()
+        pak = np.nan if pak is None else pak
+        # A repeated id replaces the earlier passAtK in place: the last one wins
+        index = index_by_id.get(id_key)
+        if index is None:
+            index_by_id[id_key] = len(ids)
+            ids.append(id_key)
+            pass_at_k.append(pak)
+        else:
+            duplicate_ids += 1
+            pass_at_k[index] = pak
+    
+    return {
+        "count": len(agents),
+        "parse_errors": len(error_lines),
+        "missing_ids": missing_ids,
+        "duplicate_ids": duplicate_ids,
+        "first_record": first_record,
+        "ids": np.array(ids, dtype=str),
+        "pass_at_k": np.frombuffer(pass_at_k, dtype=np.float64),
+        "has_score": np.frombuffer(has_score, dtype=np.bool_),
+        "score_pass": np.frombuffer(score_pass, dtype=np.bool_),
+        "score_value": np.frombuffer(score_value, dtype=np.float32),
+        "has_timing": np.frombuffer(has_timing, dtype=np.bool_),
+        "timing_total": np.frombuffer(timing_total, dtype=np.float32),
+        "agents": agents,
+        "trial_counts": np.frombuffer(trial_counts, dtype=np.int64),
+    }
+
+
+def source_key(file_path):
+    """Identify a source file's contents by name, size and modification time (ns)"""
+    st = file_path.stat()
+    return (file_path.name, st.st_size, st.st_mtime_ns)
+
+
+def save_summary_cache(summary, cache_path, key):
+    """Write a stream_fields summary to an .npz cache file, tagged with its source_key"""
+    name, size, mtime_ns = key
+    arrays = {
+        "version": np.array(SUMMARY_CACHE_VERSION),
+        "source_name": np.array(name),
+        "source_size": np.array(size, dtype=np.int64),
+        "source_mtime_ns": np.array(mtime_ns, dtype=np.int64),
+        # Non-numeric fields are stored as JSON bytes so loading never needs pickle
+        "first_record": np.frombuffer(orjson.dumps(summary["first_record"]), dtype=np.uint8),
+        "agents": np.frombuffer(orjson.dumps(summary["agents"]), dtype=np.uint8),
+    }
+    for field in SUMMARY_COUNT_FIELDS:
+        arrays[field] = np.array(summary[field], dtype=np.int64)
+    for field in SUMMARY_ARRAY_FIELDS:
+        arrays[field] = summary[field]
+    
+    # Write to a uniquely named temporary file first so an interrupted run never
+    # leaves a truncated cache and concurrent writers never share a temp file
+    tmp_file = tempfile.NamedTemporaryFile(dir=cache_path.parent, suffix=".npz.tmp", delete=False)
+    try:
+        with tmp_file:
+            np.savez_compressed(tmp_file, **arrays)
+        # NamedTemporaryFile creates the file as 0600; give the cache the same
+        # permissions a normally created file would get so others can reuse it
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_file.name, 0o666 & ~umask)
+        os.replace(tmp_file.name, cache_path)
+    finally:
+        # Only left behind if writing or renaming failed
+        if os.path.exists(tmp_file.name):
+            os.unlink(tmp_file.name)
+
+
+def load_summary_cache(cache_path, key):
+    """
+    Read a summary written by save_summary_cache
+    
+    Returns None if the cache is from another version or was built from a
+    source whose name, size or mtime differs from key.
+    """
+    with np.load(cache_path) as data:
+        if int(data["version"]) != SUMMARY_CACHE_VERSION:
+            return None
+        cached_key = (str(data["source_name"]), int(data["source_size"]), int(data["source_mtime_ns"]))
+        if cached_key != key:
+            return None
+        summary = {
+            "first_record": orjson.loads(data["first_record"].tobytes()),
+            "agents": orjson.loads(data["agents"].tobytes()),
+        }
+        for field in SUMMARY_COUNT_FIELDS:
+            summary[field] = int(data[field])
+        for field in SUMMARY_ARRAY_FIELDS:
+            summary[field] = data[field]
+    return summary
+
+
+def report_summary_warnings(summary, file_path):
+    """Print the skipped-line and id warnings recorded in a summary, cached or fresh"""
+    if summary["parse_errors"]:
+        print(f"Warning: {summary['parse_errors']} line(s) in {file_path} could not be parsed and were skipped", file=sys.stderr)
+    if summary["missing_ids"]:
+        print(f"Warning: {summary['missing_ids']} record(s) without an id in {file_path} are excluded from the comparison", file=sys.stderr)
+    if summary["duplicate_ids"]:
+        print(f"Warning: {summary['duplicate_ids']} duplicate id(s) in {file_path}; comparing the last record for each", file=sys.stderr)
+
+
+def load_summary(file_path, use_cache=True):
+    """
+    Return the stream_fields summary for a JSONL file, reusing an .npz cache when fresh
+    
+    The cache sits next to the source file (you.jsonl -> you.jsonl.npz) and is
+    used only while the source's name, size and mtime still match the values
+    recorded before it was parsed.
+    """
+    file_path = Path(file_path)
+    cache_path = file_path.with_name(file_path.name + ".npz")
+    # Taken before parsing, so a source modified mid-parse never matches the cache
+    key = source_key(file_path)
+    if use_cache and cache_path.exists():
+        try:
+            summary = load_summary_cache(cache_path, key)
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+            # A damaged or unreadable cache is just a miss; it is rewritten below
+            print(f"Warning: ignoring unreadable cache {cache_path}: {e}", file=sys.stderr)
+            summary = None
+        if summary is not None:
+            report_summary_warnings(summary, file_path)
+            return summary
+    
+    summary = stream_fields(file_path)
+    if use_cache:
+        try:
+            save_summary_cache(summary, cache_path, key)
+        except OSError as e:
+            print(f"Warning: could not write cache {cache_path}: {e}", file=sys.stderr)
+    report_summary_warnings(summary, file_path)
+    return summary
+
+
+def print_stats(summary, label=""):
+    """Print statistics for a summary produced by stream_fields"""
     if label:
         print(f"\n{'='*60}")
         print(f"{label}")
         print(f"{'='*60}")
     
-    print(f"Total instances: {len(records)}")
+    record_count = summary["count"]
+    print(f"Total instances: {record_count}")
     
-    if not records:
+    if not record_count:
         print("No records found.")
         return
     
     # Get keys from first record
-    first_record = records[0]
+    first_record = summary["first_record"]
     all_keys = get_keys_recursive(first_record)
     
     print("\nKeys in record structure:")
-    for key in sorted(set(all_keys)):
-        print(f"  - {key}")
+    sys.stdout.write("".join(f"  - {key}\n" for key in sorted(dict.fromkeys(all_keys))))
     
     # Display one example record
     print("\nExample record (first one):")
-    print(json.dumps(
-        {
-            "id": first_record["id"], 
-            "input": first_record["input"],
-            "passAtK": first_record.get("passAtK", None),
-            "k": first_record.get("k", None),
-        }, 
-        indent=2)
-    )
+    example = {
+        "id": first_record.get("id"),
+        "input": first_record.get("input"),
+        "passAtK": first_record.get("passAtK", None),
+        "k": first_record.get("k", None),
+    }
+    print(json.dumps(example, indent=2))
     
     # Overall statistics
     print("\nOverall Statistics:")
     
     # Score statistics
-    scores = [r.get("score") for r in records if r.get("score")]
-    if scores:
-        pass_count = sum(1 for s in scores if s.get("pass", False))
-        avg_score = sum(s.get("score", 0) for s in scores) / len(scores)
-        print(f"  Records with scores: {len(scores)}/{len(records)}")
-        print(f"  Pass rate: {pass_count}/{len(scores)} ({pass_count/len(scores)*100:.1f}%)")
+    has_score = summary["has_score"]
+    score_count = int(has_score.sum())
+    if score_count:
+        pass_count = int(summary["score_pass"][has_score].sum())
+        avg_score = summary["score_value"][has_score].mean(dtype=np.float64)
+        print(f"  Records with scores: {score_count}/{record_count}")
+        print(f"  Pass rate: {pass_count}/{score_count} ({pass_count/score_count*100:.1f}%)")
         print(f"  Average score: {avg_score:.2f}")
     
     # Trial statistics
-    trial_records = [r for r in records if "trials" in r]
-    if trial_records:
-        total_trials = sum(len(r.get("trials", [])) for r in records)
-        avg_trials = total_trials / len(trial_records) if trial_records else 0
-        print(f"  Records with trials: {len(trial_records)}/{len(records)}")
+    trial_counts = summary["trial_counts"]
+    trial_counts = trial_counts[trial_counts >= 0]
+    if len(trial_counts):
+        total_trials = int(trial_counts.sum())
+        avg_trials = total_trials / len(trial_counts)
+        print(f"  Records with trials: {len(trial_counts)}/{record_count}")
         print(f"  Total trials: {total_trials}")
         print(f"  Average trials per record: {avg_trials:.1f}")
     
     # Metadata statistics
     if "metadata" in first_record:
-        agents = Counter(r.get("metadata", {}).get("agent") for r in records)
+        agents = Counter(summary["agents"])
         if agents:
             print(f"  Agents: {dict(agents)}")
     
     # Timing statistics
-    timings = [r.get("timing") for r in records if r.get("timing")]
-    if timings:
-        total_times = [t.get("total", 0) for t in timings if t.get("total")]
-        if total_times:
-            avg_time = sum(total_times) / len(total_times)
-            print(f"  Average total time: {avg_time:.2f}s")
+    has_timing = summary["has_timing"]
+    if has_timing.any():
+        avg_time = summary["timing_total"][has_timing].mean(dtype=np.float64)
+        print(f"  Average total time: {avg_time:.2f}s")
 
 def calculate_percentile(values, percentile):
     """Calculate percentile from a list of values"""
-    if not values:
+    if len(values) == 0:
         return None
-    sorted_values = sorted(values)
-    index = (percentile / 100) * (len(sorted_values) - 1)
-    lower = int(index)
-    upper = min(lower + 1, len(sorted_values) - 1)
-    weight = index - lower
-    return sorted_values[lower] * (1 - weight) + sorted_values[upper] * weight
+    return float(np.percentile(values, percentile))
 
 
 def calculate_stats(values):
     """Calculate statistics for passAtK values"""
-    """Calculate and print statistics for passAtK values"""
-    if not values:
+    if len(values) == 0:
         return None
     
-    avg = sum(values) / len(values)
-    median = calculate_percentile(values, 50)
-    p25 = calculate_percentile(values, 25)
-    p75 = calculate_percentile(values, 75)
+    arr = np.asarray(values, dtype=np.float64)
+    p25, median, p75 = np.percentile(arr, [25, 50, 75])
     
     return {
-        "avg": avg,
-        "median": median,
-        "p25": p25,
-        "p75": p75
+        "avg": float(arr.mean()),
+        "median": float(median),
+        "p25": float(p25),
+        "p75": float(p75)
     }
 
-def statistical_comparison(you_values, builtin_values, alpha=0.05):
+def tie_correction_term(values):
+    """Sum of t^3 - t over groups of tied values"""
+    _, counts = np.unique(values, return_counts=True)
+    counts = counts.astype(np.float64)
+    return np.sum(counts**3 - counts)
+
+
+def rank_tests(you_values, builtin_values, differences):
+    """
+    Two-sided Mann-Whitney U and Wilcoxon signed-rank tests via the normal approximation
+    
+    Ranks each sample once with rankdata and derives the statistics, tie
+    corrections and p-values directly, matching SciPy's asymptotic method.
+    Returns ((u_stat, u_p_value), (w_stat, w_p_value))
+    """
+    # Mann-Whitney U: rank the pooled samples
+    n1, n2 = len(you_values), len(builtin_values)
+    n = n1 + n2
+    pooled = np.concatenate([you_values, builtin_values])
+    ranks = stats.rankdata(pooled)
+    u1 = ranks[:n1].sum() - n1 * (n1 + 1) / 2
+    u = max(u1, n1 * n2 - u1)
+    s = np.sqrt(n1 * n2 / 12 * ((n + 1) - tie_correction_term(pooled) / (n * (n - 1))))
+    z = (u - n1 * n2 / 2 - 0.5) / s  # continuity correction
+    u_p_value = min(2 * stats.norm.sf(z), 1.0)
+    
+    # Wilcoxon: rank absolute non-zero differences
+    d = differences[differences != 0]
+    abs_d = np.abs(d)
+    count = len(d)
+    signed_ranks = stats.rankdata(abs_d)
+    r_plus = signed_ranks[d > 0].sum()
+    r_minus = signed_ranks[d < 0].sum()
+    mn = count * (count + 1) / 4
+    se = np.sqrt((count * (count + 1) * (2 * count + 1) - tie_correction_term(abs_d) / 2) / 24)
+    w_p_value = min(2 * stats.norm.sf(abs(r_plus - mn) / se), 1.0)
+    
+    return (u1, u_p_value), (min(r_plus, r_minus), w_p_value)
+
+
+def statistical_comparison(you_values, builtin_values, alpha=0.05, differences=None, mean_diff=None, std_diff=None):
     """
     Perform statistical comparison between two groups with confidence intervals
     
+    Expects paired NumPy arrays of equal length. Callers that already computed
+    the paired differences, their mean or their std (ddof=1) can pass them in
+    to avoid recomputing them.
     Returns dictionary with test results and confidence intervals
     """
-    you_values = np.array(you_values)
-    builtin_values = np.array(builtin_values)
-    
     # Calculate differences (paired comparison)
-    differences = you_values - builtin_values
+    if differences is None:
+        differences = you_values - builtin_values
+    if mean_diff is None:
+        mean_diff = np.mean(differences)
+    if std_diff is None:
+        std_diff = np.std(differences, ddof=1)
+    n = len(differences)
+    se_diff = std_diff / np.sqrt(n)
     
     results = {}
     
-    # Paired t-test
-    t_stat, p_value = stats.ttest_rel(you_values, builtin_values)
+    # Paired t-test (same statistic as stats.ttest_rel, from the shared differences)
+    t_stat = mean_diff / se_diff
+    p_value = 2 * stats.t.sf(abs(t_stat), df=n-1)
     results['paired_t'] = {
         'statistic': t_stat,
         'p_value': p_value,
@@ -166,11 +422,6 @@ def statistical_comparison(you_values, builtin_values, alpha=0.05):
     }
     
     # Mean difference and confidence interval
-    mean_diff = np.mean(differences)
-    std_diff = np.std(differences, ddof=1)
-    n = len(differences)
-    se_diff = std_diff / np.sqrt(n)
-    
     # 95% confidence interval for mean difference
     t_critical = stats.t.ppf(1 - alpha/2, df=n-1)
     ci_lower = mean_diff - t_critical * se_diff
@@ -191,8 +442,14 @@ def statistical_comparison(you_values, builtin_values, alpha=0.05):
         'interpretation': interpret_effect_size(abs(cohens_d))
     }
     
+    # Rank-based tests (Mann-Whitney U and Wilcoxon signed-rank)
+    if n > RANK_TEST_EXACT_MAX_N:
+        (u_stat, u_p_value), (w_stat, w_p_value) = rank_tests(you_values, builtin_values, differences)
+    else:
+        u_stat, u_p_value = stats.mannwhitneyu(you_values, builtin_values, alternative='two-sided')
+        w_stat, w_p_value = stats.wilcoxon(you_values, builtin_values, alternative='two-sided')
+    
     # Mann-Whitney U test (non-parametric alternative)
-    u_stat, u_p_value = stats.mannwhitneyu(you_values, builtin_values, alternative='two-sided')
     results['mannwhitney'] = {
         'statistic': u_stat,
         'p_value': u_p_value,
@@ -200,7 +457,6 @@ def statistical_comparison(you_values, builtin_values, alpha=0.05):
     }
     
     # Wilcoxon signed-rank test (paired non-parametric)
-    w_stat, w_p_value = stats.wilcoxon(you_values, builtin_values, alternative='two-sided')
     results['wilcoxon'] = {
         'statistic': w_stat,
         'p_value': w_p_value,
@@ -222,20 +478,15 @@ def interpret_effect_size(d):
         return "large"
 
 def main():
-    # Default file paths
-    default_you_path = "data/results/2026-02-18/droid/you.jsonl"
     parser = argparse.ArgumentParser(description="Analyze JSONL result files")
     parser.add_argument("you_path", nargs="?", default="data/results/2026-02-18/droid/you.jsonl")
     parser.add_argument("builtin_path", nargs="?", default="data/results/2026-02-18/droid/builtin.jsonl")
+    parser.add_argument("--no-cache", action="store_true", help="Always re-parse the JSONL files instead of using .npz caches")
     args = parser.parse_args()
 
     you_path = Path(args.you_path)
     builtin_path = Path(args.builtin_path)
     
-    # Read both files
-    you_path = Path(default_you_path)
-    builtin_path = Path(default_builtin_path)
-    
     if not you_path.exists():
         print(f"Error: File not found: {you_path}", file=sys.stderr)
         sys.exit(1)
@@ -244,61 +495,47 @@ def main():
         print(f"Error: File not found: {builtin_path}", file=sys.stderr)
         sys.exit(1)
     
-    # Read records from both files
-    you_records = read_records(you_path)
-    builtin_records = read_records(builtin_path)
+    # Load the fields needed for aggregates from both files
+    you_summary = load_summary(you_path, use_cache=not args.no_cache)
+    builtin_summary = load_summary(builtin_path, use_cache=not args.no_cache)
     
     # Print stats for both
-    print_stats(you_records, f"YOU ({you_path.name})")
-    print_stats(builtin_records, f"BUILTIN ({builtin_path.name})")
+    print_stats(you_summary, f"YOU ({you_path.name})")
+    print_stats(builtin_summary, f"BUILTIN ({builtin_path.name})")
     
     # Compare passAtK values
     print(f"\n{'='*60}")
     print("COMPARISON: You vs Builtin (passAtK)")
     print(f"{'='*60}")
     
-    # Create dictionaries indexed by id for easy lookup
-    you_by_id = {r["id"]: r for r in you_records}
-    builtin_by_id = {r["id"]: r for r in builtin_records}
-    
-    # Find all matching IDs
-    matching_ids = set(you_by_id.keys()) & set(builtin_by_id.keys())
+    # Find all matching IDs and align both sides by index (missing passAtK is NaN)
+    you_pak = you_summary["pass_at_k"]
+    builtin_pak = builtin_summary["pass_at_k"]
+    you_ids = you_summary["ids"]
+    builtin_ids = builtin_summary["ids"]
+    if np.array_equal(you_ids, builtin_ids):
+        # Common case: both runs cover the same prompts in the same order.
+        # Ids are unique per file (stream_fields keeps the last duplicate), so
+        # this pairs exactly the records intersect1d would.
+        matching_ids = you_ids
+        you_idx = builtin_idx = np.arange(len(you_ids))
+    else:
+        matching_ids, you_idx, builtin_idx = np.intersect1d(you_ids, builtin_ids, return_indices=True)
     print(f"Records with matching IDs: {len(matching_ids)}")
     
-        # Compare passAtK values
-    you_better = []
-    you_passAtK_values = []
-    builtin_passAtK_values = []
-    for record_id in matching_ids:
-        you_record = you_by_id[record_id]
-        builtin_record = builtin_by_id[record_id]
-        
-        you_passAtK = you_record.get("passAtK")
-        builtin_passAtK = builtin_record.get("passAtK")
-        
-        if you_passAtK is not None and builtin_passAtK is not None:
-            you_passAtK_values.append(you_passAtK)
-            builtin_passAtK_values.append(builtin_passAtK)
-    for record_id in matching_ids:
-        you_record = you_by_id[record_id]
-        builtin_record = builtin_by_id[record_id]
-        
-        you_passAtK = you_record.get("passAtK")
-        builtin_passAtK = builtin_record.get("passAtK")
-        
-        # Only compare if both have passAtK values
-        if you_passAtK is not None and builtin_passAtK is not None:
-            you_passAtK_values.append(you_passAtK)
-            builtin_passAtK_values.append(builtin_passAtK)
-            
-            if you_passAtK > builtin_passAtK:
-                you_better.append((record_id, you_record, builtin_record, you_passAtK, builtin_passAtK))
+    # Only compare if both have passAtK values
+    you_passAtK_values = you_pak[you_idx]
+    builtin_passAtK_values = builtin_pak[builtin_idx]
+    both_present = ~np.isnan(you_passAtK_values) & ~np.isnan(builtin_passAtK_values)
+    you_passAtK_values = you_passAtK_values[both_present]
+    builtin_passAtK_values = builtin_passAtK_values[both_present]
     
-    print(f"\nRecords where You > Builtin: {len(you_better)}/{len(matching_ids)}")
+    you_better_count = int((you_passAtK_values > builtin_passAtK_values).sum())
+    print(f"\nRecords where You > Builtin: {you_better_count}/{len(matching_ids)}")
     
         # Calculate passAtK statistics
-    you_stats = calculate_stats(you_passAtK_values, "You")
-    builtin_stats = calculate_stats(builtin_passAtK_values, "Builtin")
+    you_stats = calculate_stats(you_passAtK_values)
+    builtin_stats = calculate_stats(builtin_passAtK_values)
     
     # Print passAtK statistics
     print(f"\n{'='*60}")
@@ -308,26 +545,31 @@ def main():
     print("-" * 50)
     
     if you_stats and builtin_stats:
-        print(f"{'Avg Pass@k':<20} {you_stats['avg']:<15.4f} {builtin_stats['avg']:<15.4f}")
-        print(f"{'Median Pass@k':<20} {you_stats['median']:<15.4f} {builtin_stats['median']:<15.4f}")
-        print(f"{'P25 Pass@k':<20} {you_stats['p25']:<15.4f} {builtin_stats['p25']:<15.4f}")
-        print(f"{'P75 Pass@k':<20} {you_stats['p75']:<15.4f} {builtin_stats['p75']:<15.4f}")
+        sys.stdout.write("".join(
+            PASS_AT_K_ROW.format(label, you_stats[key], builtin_stats[key])
+            for label, key in (
+                ("Avg Pass@k", "avg"),
+                ("Median Pass@k", "median"),
+                ("P25 Pass@k", "p25"),
+                ("P75 Pass@k", "p75"),
+            )
+        ))
     
         # Statistical comparison with individual provider stats
-    if you_passAtK_values and builtin_passAtK_values and len(you_passAtK_values) == len(builtin_passAtK_values):
-        you_array = np.array(you_passAtK_values)
-        builtin_array = np.array(builtin_passAtK_values)
-        n = len(you_passAtK_values)
+    if len(you_passAtK_values) and len(you_passAtK_values) == len(builtin_passAtK_values):
+        you_array = you_passAtK_values
+        builtin_array = builtin_passAtK_values
+        n = len(you_array)
         
         # Calculate statistics for each provider
         you_mean = np.mean(you_array)
-        you_std = np.std(you_array, ddof=1)
         you_var = np.var(you_array, ddof=1)
+        you_std = np.sqrt(you_var)
         you_se = you_std / np.sqrt(n)
         
         builtin_mean = np.mean(builtin_array)
-        builtin_std = np.std(builtin_array, ddof=1)
         builtin_var = np.var(builtin_array, ddof=1)
+        builtin_std = np.sqrt(builtin_var)
         builtin_se = builtin_std / np.sqrt(n)
         
         # Confidence intervals for each mean
@@ -376,9 +618,8 @@ def main():
         print(f"95% CI for difference: [{diff_ci_lower:.4f}, {diff_ci_upper:.4f}]")
         
         # Head-to-head breakdown
-        you_wins = sum(1 for d in differences if d > 0)
-        builtin_wins = sum(1 for d in differences if d < 0)
-        ties = sum(1 for d in differences if d == 0)
+        signs = np.sign(differences).astype(np.int8) + 1  # 0: Builtin wins, 1: tie, 2: You wins
+        builtin_wins, ties, you_wins = (int(c) for c in np.bincount(signs, minlength=3))
         
         print(f"\n{'='*60}")
         print("Head-to-Head Comparison Breakdown")
@@ -393,11 +634,8 @@ def main():
         print(f"{'='*60}")
         
         if you_wins > 0 and builtin_wins > 0:
-            you_win_diffs = [d for d in differences if d > 0]
-            builtin_win_diffs = [abs(d) for d in differences if d < 0]
-            
-            avg_you_win_margin = np.mean(you_win_diffs) if you_win_diffs else 0
-            avg_builtin_win_margin = np.mean(builtin_win_diffs) if builtin_win_diffs else 0
+            avg_you_win_margin = differences[signs == 2].mean()
+            avg_builtin_win_margin = -differences[signs == 0].mean()
             
             print(f"When You wins: average margin = {avg_you_win_margin:.4f}")
             print(f"When Builtin wins: average margin = {avg_builtin_win_margin:.4f}")
@@ -411,7 +649,9 @@ def main():
             print(f"  - You's wins tend to be by larger margins, explaining the better average")
         
         # Statistical tests
-        stats_results = statistical_comparison(you_passAtK_values, builtin_passAtK_values)
+        stats_results = statistical_comparison(
+            you_array, builtin_array, differences=differences, mean_diff=mean_diff, std_diff=diff_std
+        )
         
         print(f"\n{'='*60}")
         print("Statistical Significance Tests")